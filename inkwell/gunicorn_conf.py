@@ -0,0 +1,94 @@
+"""
+Gunicorn configuration for InkWell production deployments.
+
+Usage:
+    gunicorn -c python:inkwell.gunicorn_conf inkwell.wsgi:application
+
+The application is loaded and warmed in the master before forking, so
+workers share Django, the admin and all apps copy-on-write instead of each
+importing them again.
+
+Gunicorn reads every top-level name that matches one of its settings, so
+helpers here are underscore-private and ``decouple`` is used by module name
+(``config`` is itself a gunicorn setting).
+"""
+
+import math
+import os
+
+import decouple
+
+
+def _cpu_count():
+    """CPUs available to this container: affinity, then any cgroup v2 quota."""
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS
+        count = os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            count = min(count, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(count, 1)
+
+
+bind = decouple.config('GUNICORN_BIND', default='0.0.0.0:8000')
+
+# Workers are sized from the CPUs; threads only cover I/O waits within a
+# worker, so they default to a fixed 2 rather than scaling with CPUs.
+_cpus = _cpu_count()
+_max_workers = decouple.config('GUNICORN_MAX_WORKERS', default=8, cast=int)
+workers = decouple.config('GUNICORN_WORKERS', default=min(_cpus * 2 + 1, _max_workers), cast=int)
+threads = decouple.config('GUNICORN_THREADS', default=2, cast=int)
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+# Load the app once in the master and fork workers from it
+preload_app = True
+
+# Recycle workers gracefully; jitter keeps them from restarting together
+max_requests = decouple.config('GUNICORN_MAX_REQUESTS', default=1000, cast=int)
+max_requests_jitter = decouple.config('GUNICORN_MAX_REQUESTS_JITTER', default=100, cast=int)
+timeout = decouple.config('GUNICORN_TIMEOUT', default=30, cast=int)
+graceful_timeout = decouple.config('GUNICORN_GRACEFUL_TIMEOUT', default=30, cast=int)
+keepalive = decouple.config('GUNICORN_KEEPALIVE', default=5, cast=int)
+
+# Keep the worker heartbeat file off disk
+worker_tmp_dir = decouple.config('GUNICORN_WORKER_TMP_DIR', default='/dev/shm')
+
+# Access logging is opt-in (e.g. GUNICORN_ACCESS_LOG=-); it is written
+# synchronously by the worker for every request.
+accesslog = decouple.config('GUNICORN_ACCESS_LOG', default=None)
+errorlog = decouple.config('GUNICORN_ERROR_LOG', default='-')
+loglevel = decouple.config('LOG_LEVEL', default='info').lower()
+
+
+def when_ready(server):
+    """Warm the preloaded app in the master, before any worker is forked."""
+    from django.db import connections
+
+    from inkwell.log import shutdown
+    from inkwell.startup import warm_up
+
+    warm_up()
+    # Database connections must not be shared across fork, and the master
+    # should have no logging thread running when it forks. Later records
+    # in the master are written synchronously.
+    connections.close_all()
+    shutdown()
+
+
+def worker_exit(server, worker):
+    """Flush queued log records before the worker process goes away."""
+    from inkwell.log import shutdown
+
+    shutdown()
+
+
+def on_exit(server):
+    """Flush queued log records from the master on shutdown."""
+    from inkwell.log import shutdown
+
+    shutdown()
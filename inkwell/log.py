@@ -0,0 +1,249 @@
+"""
+Logging helpers for InkWell production deployments.
+
+Records are handed off to an in-memory queue on the request thread and
+written to the real handlers by a background listener, so slow disks never
+add to request latency. Each process gets its own listener thread and its
+own log file, which keeps gunicorn workers from interleaving writes.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+_listeners = []
+_listeners_lock = threading.Lock()
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # Block rather than raise queue.Full; the listener thread is draining.
+        self.queue.put(self._sentinel)
+
+
+class QueueListenerHandler(QueueHandler):
+    """
+    Queue records and write them to ``handlers`` from a background thread.
+
+    ``handlers`` are handler objects, normally given in ``LOGGING`` as
+    ``cfg://handlers.<name>`` references; they must sort before this
+    handler's own name so that ``dictConfig`` has built them already. The
+    listener is started lazily on the first record seen in each process,
+    so a handler configured in the gunicorn master before forking still works
+    in every worker. Records are dropped rather than blocking the caller when
+    the queue is full, and a warning with the count is queued as soon as
+    there is room again.
+    """
+
+    def __init__(self, handlers, queue_size=10000):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        # Index rather than iterate so dictConfig resolves cfg:// references.
+        self.handlers = [handlers[i] for i in range(len(handlers))]
+        for handler in self.handlers:
+            if not isinstance(handler, logging.Handler):
+                raise TypeError(f'Queue target is not a configured handler: {handler!r}')
+        self.queue_size = queue_size
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+        self.listener = None
+        self._pid = None
+        self._closed_pid = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def closed(self):
+        return self._closed_pid == os.getpid()
+
+    def _ensure_listener(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            # A listener inherited across fork has no running thread, so
+            # start afresh with an empty queue in this process.
+            self.queue = queue.Queue(maxsize=self.queue_size)
+            self.dropped = 0
+            self._dropped_lock = threading.Lock()
+            self.listener = _Listener(self.queue, *self.handlers, respect_handler_level=True)
+            self.listener.start()
+            self._pid = os.getpid()
+            _register(self)
+
+    def prepare(self, record):
+        # Render the message and traceback here, but leave the final
+        # formatting to each target handler so they keep their own formatters.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+            return
+        if self.dropped:
+            self._report_dropped(self.queue.put_nowait)
+
+    def _report_dropped(self, write):
+        with self._dropped_lock:
+            dropped, self.dropped = self.dropped, 0
+        if not dropped:
+            return
+        record = logging.LogRecord(
+            __name__, logging.WARNING, __file__, 0,
+            'Dropped %d log records because the logging queue was full', (dropped,), None,
+        )
+        try:
+            write(self.prepare(record))
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += dropped
+
+    def _handle_directly(self, record):
+        for handler in self.handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+    def emit(self, record):
+        try:
+            if self.closed:
+                # Nothing would drain a new listener after shutdown.
+                self._handle_directly(self.prepare(record))
+                return
+            self._ensure_listener()
+            self.enqueue(self.prepare(record))
+        except Exception:
+            self.handleError(record)
+
+    def stop(self):
+        """
+        Drain the queue and flush the target handlers.
+
+        Records logged in this process afterwards are written synchronously.
+        """
+        with self._start_lock:
+            self._closed_pid = os.getpid()
+            if self.listener is None or self._pid != os.getpid():
+                return
+            self.listener.stop()
+            self.listener = None
+            self._pid = None
+        self._report_dropped(self._handle_directly)
+        for handler in self.handlers:
+            handler.flush()
+
+    def close(self):
+        self.stop()
+        super().close()
+
+
+class ProcessRotatingFileHandler(RotatingFileHandler):
+    """
+    Rotating file handler that writes to one file per process.
+
+    ``filename`` may contain a ``{pid}`` placeholder. The file is opened on
+    the first write, and reopened under the new pid after a fork.
+    """
+
+    def __init__(self, filename, mode='a', maxBytes=0, backupCount=0, encoding=None, errors=None):
+        self.filename_template = str(filename)
+        self._pid = os.getpid()
+        super().__init__(
+            self._filename_for_pid(), mode, maxBytes, backupCount,
+            encoding=encoding, delay=True, errors=errors,
+        )
+
+    def _filename_for_pid(self):
+        return os.path.abspath(self.filename_template.format(pid=self._pid))
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+    def emit(self, record):
+        if self._pid != os.getpid():
+            # The stream belongs to the parent process; drop our copy of it.
+            if self.stream is not None:
+                self.stream.close()
+                self.stream = None
+            self._pid = os.getpid()
+            self.baseFilename = self._filename_for_pid()
+        super().emit(record)
+
+
+class SampleFilter(logging.Filter):
+    """
+    Let through only a fraction of records at or below ``level``.
+
+    Records above ``level`` always pass, so warnings and errors are never
+    sampled away.
+    """
+
+    def __init__(self, rate=1.0, level=logging.INFO):
+        super().__init__()
+        self.rate = float(rate)
+        self.level = level if isinstance(level, int) else logging.getLevelName(level)
+
+    def filter(self, record):
+        if record.levelno > self.level or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """Format each record as a single JSON object per line."""
+
+    def format(self, record):
+        data = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'module': record.module,
+            'process': record.process,
+            'thread': record.thread,
+            'message': record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exc_info'] = record.exc_text
+        if record.stack_info:
+            data['stack_info'] = self.formatStack(record.stack_info)
+        return json.dumps(data, default=str)
+
+
+def _register(handler):
+    with _listeners_lock:
+        if handler not in _listeners:
+            _listeners.append(handler)
+
+
+def shutdown():
+    """
+    Stop every queue listener in this process, flushing pending records.
+
+    Registered with ``atexit``; also safe to call from a worker shutdown hook.
+    """
+    with _listeners_lock:
+        handlers = list(_listeners)
+        _listeners.clear()
+    for handler in handlers:
+        handler.stop()
+
+
+atexit.register(shutdown)
@@ -56,6 +56,13 @@ EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 
 # Logging
+# Records are queued on the request thread and written by a background
+# listener (see inkwell/log.py). By default they go to stdout as JSON lines;
+# LOG_TO_FILE adds one rotating file per process under LOG_DIR.
+LOG_FORMAT = config('LOG_FORMAT', default='json')  # 'json' or 'verbose'
+LOG_TO_FILE = config('LOG_TO_FILE', default=False, cast=bool)
+LOG_DIR = config('LOG_DIR', default='/app/logs')
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -64,31 +71,48 @@ LOGGING = {
             'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
             'style': '{',
         },
-        'simple': {
-            'format': '{levelname} {message}',
-            'style': '{',
+        'json': {
+            '()': 'inkwell.log.JsonFormatter',
+        },
+    },
+    'filters': {
+        'sample_info': {
+            '()': 'inkwell.log.SampleFilter',
+            'rate': config('LOG_INFO_SAMPLE_RATE', default=1.0, cast=float),
+            'level': 'INFO',
         },
     },
     'handlers': {
         'file': {
             'level': 'INFO',
-            'class': 'logging.FileHandler',
-            'filename': '/app/logs/django.log',
-            'formatter': 'verbose',
+            'class': 'inkwell.log.ProcessRotatingFileHandler',
+            'filename': os.path.join(LOG_DIR, 'django-{pid}.log'),
+            'maxBytes': config('LOG_MAX_BYTES', default=10 * 1024 * 1024, cast=int),
+            'backupCount': config('LOG_BACKUP_COUNT', default=5, cast=int),
+            'formatter': 'json' if LOG_FORMAT == 'json' else 'verbose',
         },
         'console': {
             'level': 'INFO',
             'class': 'logging.StreamHandler',
-            'formatter': 'simple',
+            'stream': 'ext://sys.stdout',
+            'formatter': 'json' if LOG_FORMAT == 'json' else 'verbose',
+        },
+        # Targets must sort before 'queue' so they are built by the time
+        # these references are resolved.
+        'queue': {
+            '()': 'inkwell.log.QueueListenerHandler',
+            'handlers': ['cfg://handlers.console'] + (['cfg://handlers.file'] if LOG_TO_FILE else []),
+            'queue_size': config('LOG_QUEUE_SIZE', default=10000, cast=int),
+            'filters': ['sample_info'],
         },
     },
     'root': {
-        'handlers': ['console', 'file'],
+        'handlers': ['queue'],
         'level': config('LOG_LEVEL', default='INFO'),
     },
     'loggers': {
         'django': {
-            'handlers': ['console', 'file'],
+            'handlers': ['queue'],
             'level': config('LOG_LEVEL', default='INFO'),
             'propagate': False,
         },
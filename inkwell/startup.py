@@ -0,0 +1,142 @@
+"""
+Startup helpers for InkWell.
+
+``warm_up()`` does the one-off work a worker would otherwise pay for on its
+first requests, and is called from the gunicorn master before forking (see
+inkwell/gunicorn_conf.py). Running this module measures how long it takes
+to import ``inkwell.wsgi`` and to serve the first request:
+
+    python -m inkwell.startup [--path /] [--warm] [--no-https]
+"""
+
+import argparse
+import io
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+def warm_resolver():
+    """Import every URLconf and build the reverse lookup tables."""
+    from django.urls import get_resolver
+
+    # Accessing reverse_dict populates the resolver for the default language.
+    return len(get_resolver().reverse_dict)
+
+
+def warm_templates():
+    """Compile the project's own templates into the cached loaders."""
+    from django.conf import settings
+    from django.template import engines
+    from django.template.backends.django import DjangoTemplates
+
+    base_dir = Path(settings.BASE_DIR).resolve()
+    count = 0
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        for template_dir in engine.template_dirs:
+            template_dir = Path(template_dir).resolve()
+            if not template_dir.is_dir() or base_dir not in template_dir.parents:
+                continue
+            for path in template_dir.rglob('*.html'):
+                engine.get_template(path.relative_to(template_dir).as_posix())
+                count += 1
+    return count
+
+
+def warm_up():
+    """Warm the URL resolver and templates, logging rather than raising."""
+    for step in (warm_resolver, warm_templates):
+        start = time.perf_counter()
+        try:
+            count = step()
+        except Exception:
+            logger.exception('Startup warm-up step %s failed', step.__name__)
+        else:
+            logger.info('%s: %d items in %.1f ms', step.__name__, count, (time.perf_counter() - start) * 1000)
+
+
+def _request(application, path, host, https=True):
+    from wsgiref.util import setup_testing_defaults
+
+    environ = {'PATH_INFO': path, 'HTTP_HOST': host, 'wsgi.input': io.BytesIO()}
+    if https:
+        # Otherwise SECURE_SSL_REDIRECT answers with a redirect, not the view.
+        environ.update({'wsgi.url_scheme': 'https', 'HTTPS': 'on', 'SERVER_PORT': '443'})
+    setup_testing_defaults(environ)
+    status = []
+
+    def start_response(value, headers, exc_info=None):
+        status.append(value)
+
+    start = time.perf_counter()
+    response = application(environ, start_response)
+    try:
+        for _chunk in response:
+            pass
+    finally:
+        if hasattr(response, 'close'):
+            response.close()
+    return status[0], time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m inkwell.startup',
+        description='Report import time and time to first request for inkwell.wsgi.',
+    )
+    parser.add_argument('--path', default='/', help='path to request (default: /)')
+    parser.add_argument('--host', help='Host header to send (default: first ALLOWED_HOSTS entry)')
+    parser.add_argument('--warm', action='store_true', help='run warm_up() before the first request')
+    parser.add_argument(
+        '--https', action=argparse.BooleanOptionalAction, default=True,
+        help='send the requests as https (default: on)',
+    )
+    args = parser.parse_args(argv)
+
+    if 'django' in sys.modules:
+        parser.error('must be run in a fresh interpreter')
+
+    start = time.perf_counter()
+    import django  # noqa: F401
+    django_import = time.perf_counter() - start
+
+    start = time.perf_counter()
+    from inkwell.wsgi import application
+    wsgi_import = time.perf_counter() - start
+
+    from django.conf import settings
+
+    warm = 0.0
+    if args.warm:
+        start = time.perf_counter()
+        warm_up()
+        warm = time.perf_counter() - start
+
+    host = args.host or next((h for h in settings.ALLOWED_HOSTS if h and h != '*'), 'localhost')
+    first_status, first = _request(application, args.path, host, args.https)
+    second_status, second = _request(application, args.path, host, args.https)
+
+    print(f'settings:             {os.environ.get("DJANGO_SETTINGS_MODULE")}')
+    print(f'import django:        {django_import * 1000:8.1f} ms')
+    print(f'import inkwell.wsgi:  {wsgi_import * 1000:8.1f} ms')
+    if args.warm:
+        print(f'warm_up():            {warm * 1000:8.1f} ms')
+    print(f'first request:        {first * 1000:8.1f} ms  ({first_status})')
+    print(f'second request:       {second * 1000:8.1f} ms  ({second_status})')
+    print(f'time to first request:{(django_import + wsgi_import + warm + first) * 1000:8.1f} ms')
+    if first_status.startswith('3'):
+        print(
+            f'warning: {args.path} returned a redirect ({first_status}), so the timing '
+            f'does not include a view; pass the final --path instead',
+            file=sys.stderr,
+        )
+
+
+if __name__ == '__main__':
+    main()
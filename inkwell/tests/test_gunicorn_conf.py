@@ -0,0 +1,77 @@
+import importlib
+import os
+import sys
+import unittest
+from unittest import mock
+
+try:
+    import decouple  # noqa: F401
+except ImportError:
+    decouple = None
+
+try:
+    from gunicorn.app.base import Application
+except ImportError:
+    Application = None
+
+
+@unittest.skipIf(decouple is None, 'requires python-decouple')
+class GunicornConfTests(unittest.TestCase):
+    def _load(self, environ=None):
+        sys.modules.pop('inkwell.gunicorn_conf', None)
+        self.addCleanup(sys.modules.pop, 'inkwell.gunicorn_conf', None)
+        with mock.patch.dict(os.environ, environ or {}):
+            return importlib.import_module('inkwell.gunicorn_conf')
+
+    def test_cpu_count_respects_cgroup_quota(self):
+        conf = self._load()
+        with mock.patch('os.sched_getaffinity', return_value=set(range(64)), create=True), \
+                mock.patch('builtins.open', mock.mock_open(read_data='150000 100000\n')):
+            self.assertEqual(conf._cpu_count(), 2)
+
+    def test_cpu_count_without_quota_uses_affinity(self):
+        conf = self._load()
+        with mock.patch('os.sched_getaffinity', return_value=set(range(4)), create=True), \
+                mock.patch('builtins.open', mock.mock_open(read_data='max 100000\n')):
+            self.assertEqual(conf._cpu_count(), 4)
+
+    def test_default_workers_are_capped(self):
+        conf = self._load({'GUNICORN_MAX_WORKERS': '3'})
+        self.assertEqual(conf.workers, min(conf._cpus * 2 + 1, 3))
+
+    @unittest.skipIf(Application is None, 'requires gunicorn')
+    def test_loads_through_gunicorn_config_loader(self):
+        class ConfigOnly(Application):
+            def load_config(self):
+                # Skip command-line parsing; only the config module is loaded.
+                pass
+
+            def load(self):
+                pass
+
+        sys.modules.pop('inkwell.gunicorn_conf', None)
+        self.addCleanup(sys.modules.pop, 'inkwell.gunicorn_conf', None)
+        environ = {'GUNICORN_WORKERS': '3', 'GUNICORN_THREADS': '4'}
+        with mock.patch.dict(os.environ, environ):
+            app = ConfigOnly()
+            app.load_config_from_module_name_or_filename('python:inkwell.gunicorn_conf')
+
+        self.assertEqual(app.cfg.workers, 3)
+        self.assertEqual(app.cfg.threads, 4)
+        self.assertEqual(app.cfg.worker_class_str, 'gthread')
+        self.assertTrue(app.cfg.preload_app)
+        self.assertIsNone(app.cfg.accesslog)
+        self.assertEqual(app.cfg.bind, ['0.0.0.0:8000'])
+
+    def test_when_ready_stops_logging_thread_before_fork(self):
+        try:
+            import django  # noqa: F401
+        except ImportError:
+            self.skipTest('requires Django')
+        conf = self._load()
+        with mock.patch('inkwell.startup.warm_up'), \
+                mock.patch('django.db.connections') as connections, \
+                mock.patch('inkwell.log.shutdown') as shutdown:
+            conf.when_ready(server=None)
+        connections.close_all.assert_called_once()
+        shutdown.assert_called_once()
@@ -0,0 +1,224 @@
+import contextlib
+import copy
+import gc
+import importlib
+import io
+import json
+import logging
+import logging.config
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from inkwell.log import ProcessRotatingFileHandler, QueueListenerHandler
+
+
+class BlockingHandler(logging.Handler):
+    """Hold the listener thread on the first record until released."""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self.entered = threading.Event()
+        self.unblock = threading.Event()
+
+    def emit(self, record):
+        self.entered.set()
+        self.unblock.wait(5)
+        self.records.append(record)
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def _configure(logger_name, queue_size=10000):
+    logging.config.dictConfig({
+        'version': 1,
+        'disable_existing_loggers': False,
+        'handlers': {
+            'capture': {'()': ListHandler},
+            'queue': {
+                '()': 'inkwell.log.QueueListenerHandler',
+                'handlers': ['cfg://handlers.capture'],
+                'queue_size': queue_size,
+            },
+        },
+        'loggers': {
+            logger_name: {'handlers': ['queue'], 'level': 'INFO', 'propagate': False},
+        },
+    })
+    logger = logging.getLogger(logger_name)
+    return logger, logger.handlers[0]
+
+
+class QueueListenerHandlerTests(unittest.TestCase):
+    def setUp(self):
+        self.logger, self.handler = _configure(f'inkwell.tests.{self._testMethodName}')
+        self.capture = self.handler.handlers[0]
+        self.addCleanup(self.handler.close)
+
+    def test_targets_survive_garbage_collection(self):
+        gc.collect()
+        self.logger.info('hello %s', 'world')
+        self.handler.stop()
+        self.assertEqual([r.getMessage() for r in self.capture.records], ['hello world'])
+
+    def test_records_after_stop_are_written_directly(self):
+        self.logger.info('before')
+        self.handler.stop()
+        self.logger.info('after')
+        self.assertIsNone(self.handler.listener)
+        self.assertEqual([r.getMessage() for r in self.capture.records], ['before', 'after'])
+
+    def test_dropped_records_reported_on_stop(self):
+        self.logger.info('start')
+        self.handler.dropped = 3
+        self.handler.stop()
+        self.assertIn('Dropped 3 log records', self.capture.records[-1].getMessage())
+
+    def test_dropped_records_reported_once_queue_has_room(self):
+        target = BlockingHandler()
+        handler = QueueListenerHandler([target], queue_size=2)
+        self.addCleanup(handler.close)
+        logger = logging.getLogger('inkwell.tests.dropped')
+        logger.propagate = False
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+
+        logger.warning('a')
+        self.assertTrue(target.entered.wait(5))
+        for message in 'bcde':  # 'b' and 'c' fill the queue, 'd' and 'e' are dropped
+            logger.warning(message)
+        self.assertEqual(handler.dropped, 2)
+        target.unblock.set()
+        handler.queue.join()
+        logger.warning('f')
+        handler.queue.join()
+
+        self.assertEqual(handler.dropped, 0)
+        self.assertEqual(
+            [r.getMessage() for r in target.records],
+            ['a', 'b', 'c', 'f', 'Dropped 2 log records because the logging queue was full'],
+        )
+
+    def test_exception_is_rendered_before_queueing(self):
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            self.logger.exception('boom')
+        self.handler.stop()
+        record = self.capture.records[0]
+        self.assertIsNone(record.exc_info)
+        self.assertIn('ZeroDivisionError', record.exc_text)
+
+    def test_listener_start_failure_goes_through_handle_error(self):
+        with mock.patch.object(self.handler, '_ensure_listener', side_effect=RuntimeError), \
+                mock.patch.object(self.handler, 'handleError') as handle_error:
+            self.logger.info('lost')
+        handle_error.assert_called_once()
+
+
+@unittest.skipUnless(hasattr(os, 'fork'), 'requires os.fork')
+class ForkTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.log_dir = Path(tmp.name)
+
+    def _fork(self, child):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                child()
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        return pid
+
+    def test_file_handler_reopens_under_child_pid(self):
+        handler = ProcessRotatingFileHandler(str(self.log_dir / 'django-{pid}.log'))
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        self.addCleanup(handler.close)
+        record = logging.LogRecord('t', logging.INFO, __file__, 0, 'parent', None, None)
+        handler.emit(record)
+
+        def child():
+            handler.emit(logging.LogRecord('t', logging.INFO, __file__, 0, 'child', None, None))
+            handler.close()
+
+        child_pid = self._fork(child)
+        handler.flush()
+        self.assertEqual((self.log_dir / f'django-{os.getpid()}.log').read_text(), 'parent\n')
+        self.assertEqual((self.log_dir / f'django-{child_pid}.log').read_text(), 'child\n')
+
+    def test_listener_restarts_in_child(self):
+        logger, handler = _configure('inkwell.tests.fork')
+        self.addCleanup(handler.close)
+        path = self.log_dir / 'child.log'
+        logger.info('parent')
+        handler.queue.join()  # the parent's listener is running when we fork
+
+        def child():
+            logger.info('child')
+            handler.stop()
+            messages = [r.getMessage() for r in handler.handlers[0].records]
+            path.write_text(json.dumps(messages))
+
+        self._fork(child)
+        self.assertEqual(json.loads(path.read_text()), ['parent', 'child'])
+
+
+class ProductionLoggingTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.log_dir = Path(tmp.name)
+        environ = {
+            'SECRET_KEY': 'test',
+            'DATABASE_URL': 'sqlite:///' + str(self.log_dir / 'db.sqlite3'),
+            'LOG_TO_FILE': 'True',
+            'LOG_DIR': str(self.log_dir),
+        }
+        sys.modules.pop('inkwell.settings_production', None)
+        with mock.patch.dict(os.environ, environ):
+            try:
+                settings = importlib.import_module('inkwell.settings_production')
+            except ImportError as e:
+                self.skipTest(f'production settings dependencies missing: {e}')
+            finally:
+                sys.modules.pop('inkwell.settings_production', None)
+        self.logging_config = copy.deepcopy(settings.LOGGING)
+
+        root = logging.getLogger()
+        django = logging.getLogger('django')
+        saved = (root.handlers[:], root.level, django.handlers[:], django.level, django.propagate)
+
+        def restore():
+            root.handlers[:], root.level, django.handlers[:], django.level, django.propagate = saved
+        self.addCleanup(restore)
+
+    def test_dict_config_survives_gc_and_writes_file(self):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            logging.config.dictConfig(self.logging_config)
+        handler = logging.getLogger('django').handlers[0]
+        self.addCleanup(handler.close)
+        self.assertIsInstance(handler, QueueListenerHandler)
+
+        gc.collect()
+        logging.getLogger('django.request').warning('Not Found: /missing/')
+        handler.stop()
+
+        [line] = (self.log_dir / f'django-{os.getpid()}.log').read_text().splitlines()
+        self.assertEqual(json.loads(line)['message'], 'Not Found: /missing/')
+        self.assertEqual(json.loads(stdout.getvalue())['logger'], 'django.request')